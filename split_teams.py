@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
-import csv
-import argparse
-from collections import defaultdict
+# Keep module-level imports to what the thin client needs: csv, argparse and
+# the socket machinery are imported where they are used so that
+# `split_teams.py client ...` stays cheap to start. re is kept here since it is
+# on the crosscheck hot path and json (used by the client) imports it anyway.
+import os
 import re
-from pathlib import Path
+import sys
+from collections import defaultdict
 
 
 def normalize_role(raw):
@@ -27,9 +30,9 @@ def parse_players(path):
     Accepts paths to files with extensions: .tsv, .csv, .xlsx, .xls
     Returns list of player dicts with keys: name, dob, role, league, impact
     """
+    import csv
     players = []
-    p = Path(path)
-    suffix = p.suffix.lower()
+    suffix = os.path.splitext(path)[1].lower()
 
     # Excel handling via pandas if available
     if suffix in ('.xlsx', '.xls'):
@@ -93,10 +96,9 @@ def parse_availability(path):
     If Excel is provided, attempts to read a column named 'Player Name' or uses the
     first column.
     """
-    from pathlib import Path
+    import csv
     names = []
-    p = Path(path)
-    suffix = p.suffix.lower()
+    suffix = os.path.splitext(path)[1].lower()
 
     if suffix in ('.xlsx', '.xls'):
         try:
@@ -289,7 +291,8 @@ def write_team(path, team):
             f.write(f"{p['name']}\n")
 
 
-def main():
+def build_parser():
+    import argparse
     parser = argparse.ArgumentParser(description='Split players into two balanced teams')
     parser.add_argument('input', help='Path to players TSV file')
     parser.add_argument('--impact-weight', type=int, default=100)
@@ -300,11 +303,18 @@ def main():
     parser.add_argument('--master', help='Path to master players TSV (default: provided input file)', default=None)
     parser.add_argument('--write-output', action='store_true')
     parser.add_argument('--out-prefix', default='teams')
-    args = parser.parse_args()
+    return parser
+
 
+def run(args, load_players=parse_players):
+    """Run a split for parsed CLI `args`, printing the report to stdout.
+
+    `load_players` lets the daemon substitute its cached roster parser; the
+    players it returns are copied before scoring.
+    """
     # use provided master if given, otherwise use the input TSV as master
     master_path = args.master or args.input
-    master_players = parse_players(master_path)
+    master_players = [dict(p) for p in load_players(master_path)]
 
     if args.availability:
         avail_names = parse_availability(args.availability)
@@ -343,5 +353,378 @@ def main():
         print(f"\nWrote {a_path} and {b_path}")
 
 
+# -------------------- BATCH --------------------
+
+BATCH_SUFFIXES = ('', '.txt', '.tsv', '.csv', '.xlsx', '.xls')
+
+_batch_master = None
+
+
+def _init_batch_worker(master_players):
+    global _batch_master
+    _batch_master = master_players
+
+
+def _split_availability_file(path, name, out_dir, impact_w, league_w, ensure_role_parity):
+    """Split one availability file against the shared master and write `<name>_A/B.tsv`."""
+    try:
+        master = [dict(p) for p in _batch_master]
+        matched, unmatched, ambiguous = crosscheck_availability(master, parse_availability(path))
+        teamA, teamB, totals = split_teams(matched, impact_w=impact_w, league_w=league_w,
+                                           ensure_role_parity=ensure_role_parity)
+        write_team(os.path.join(out_dir, f"{name}_A.tsv"), teamA)
+        write_team(os.path.join(out_dir, f"{name}_B.tsv"), teamB)
+    except Exception as e:
+        return {'name': name, 'error': f'{type(e).__name__}: {e}'}
+    return {
+        'name': name,
+        'sizes': (len(teamA), len(teamB)),
+        'totals': totals,
+        'unmatched': unmatched,
+        'ambiguous': ambiguous,
+    }
+
+
+def batch(argv):
+    import argparse
+    import functools
+    parser = argparse.ArgumentParser(prog='split_teams.py batch',
+                                     description='Split every availability file in a directory against one master')
+    parser.add_argument('master', help='Path to master players TSV')
+    parser.add_argument('directory', help='Directory of availability files')
+    parser.add_argument('--out-dir', default='generated', help='Where to write <name>_A.tsv / <name>_B.tsv (default: generated)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count; 1 runs sequentially)')
+    parser.add_argument('--impact-weight', type=int, default=100)
+    parser.add_argument('--league-weight', type=int, default=10)
+    parser.add_argument('--role-parity', action='store_true', dest='role_parity',
+                        help='Try to enforce equal per-role counts between teams')
+    args = parser.parse_args(argv)
+
+    out_dir = os.path.abspath(args.out_dir)
+    if os.path.realpath(out_dir) == os.path.realpath(args.directory):
+        # earlier <name>_A.tsv / <name>_B.tsv outputs would be picked up as availability files
+        parser.error('--out-dir must differ from the availability directory')
+    paths = sorted(
+        e.path for e in os.scandir(args.directory)
+        if e.is_file() and not e.name.startswith('.')
+        and os.path.splitext(e.name)[1].lower() in BATCH_SUFFIXES
+        and os.path.abspath(e.path) != os.path.abspath(args.master)
+    )
+    if not paths:
+        print(f"No availability files found in {args.directory}")
+        return 1
+    os.makedirs(out_dir, exist_ok=True)
+
+    # name outputs after the file stem, falling back to the full file name for
+    # every file whose name clashes (nets.txt, nets.csv, nets.txt.tsv ->
+    # nets.txt_A.tsv, nets.csv_A.tsv, nets.txt.tsv_A.tsv). File names are unique
+    # within the directory, so repeating until no clash is left terminates.
+    basenames = [os.path.basename(p) for p in paths]
+    names = [os.path.splitext(b)[0] for b in basenames]
+    while True:
+        counts = defaultdict(int)
+        for n in names:
+            counts[n] += 1
+        clashing = [i for i, n in enumerate(names) if counts[n] > 1]
+        if not clashing:
+            break
+        for i in clashing:
+            names[i] = basenames[i]
+    renamed = [b for b, n in zip(basenames, names) if n == b and os.path.splitext(b)[1]]
+
+    master_players = parse_players(args.master)
+    split_file = functools.partial(_split_availability_file, out_dir=out_dir,
+                                   impact_w=args.impact_weight, league_w=args.league_weight,
+                                   ensure_role_parity=args.role_parity)
+    jobs = max(1, min(args.jobs, len(paths)))
+    if jobs == 1:
+        _init_batch_worker(master_players)
+        results = list(map(split_file, paths, names))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                                 initargs=(master_players,)) as pool:
+            results = list(pool.map(split_file, paths, names,
+                                    chunksize=max(1, len(paths) // (jobs * 4))))
+
+    unmatched = defaultdict(list)
+    ambiguous = {}
+    failed = 0
+    for r in results:
+        if 'error' in r:
+            failed += 1
+            print(f" ! {r['name']}: {r['error']}")
+            continue
+        a, b = r['sizes']
+        print(f" - {r['name']}: A={a} (score={r['totals']['A']}) B={b} (score={r['totals']['B']})"
+              f" unmatched={len(r['unmatched'])} ambiguous={len(r['ambiguous'])}")
+        # count each file once per name, even if the name is repeated inside it
+        for n in dict.fromkeys(r['unmatched']):
+            unmatched[n].append(r['name'])
+        for raw, opts in dict(r['ambiguous']).items():
+            ambiguous.setdefault(raw, (opts, []))[1].append(r['name'])
+
+    print(f"\nProcessed {len(results) - failed}/{len(results)} files, wrote teams to {out_dir}")
+    if renamed:
+        print(f"Note: {len(renamed)} files share an output name with another file; their outputs keep the extension:")
+        for b in renamed:
+            print(f" - {b}")
+    if unmatched:
+        print(f"Warning: {len(unmatched)} distinct availability names not found in master:")
+        for n, files in sorted(unmatched.items()):
+            print(f" - {n} ({len(files)} files: {', '.join(files)})")
+    if ambiguous:
+        print(f"Warning: {len(ambiguous)} distinct ambiguous availability names (multiple matches):")
+        for raw, (opts, files) in sorted(ambiguous.items()):
+            print(f" - {raw} -> possible matches: {', '.join(opts)} ({len(files)} files)")
+    return 1 if failed else 0
+
+
+# -------------------- DAEMON --------------------
+#
+# `split_teams.py serve` keeps parsed rosters in memory and answers requests on
+# a local Unix socket; `split_teams.py client ...` forwards ordinary CLI args to
+# it. The protocol is one JSON object per connection in each direction, each
+# terminated by a newline:
+#
+#   {"cmd": "split", "argv": [...], "cwd": "/abs/dir"}
+#       -> {"ok": true, "status": 0, "output": "...", "stderr": "..."}
+#   {"cmd": "crosscheck", "master": path, "availability": path, "cwd": "/abs/dir"}
+#       -> {"ok": true, "matched": [...], "unmatched": [...], "ambiguous": [[raw, [...]], ...]}
+#   {"cmd": "ping"} / {"cmd": "shutdown"} -> {"ok": true}
+#
+# Failures are reported as {"ok": false, "error": "..."}.
+
+def default_socket_path():
+    """Socket path: $SPLIT_TEAMS_SOCKET, else $XDG_RUNTIME_DIR, else a private dir under /tmp."""
+    if os.environ.get('SPLIT_TEAMS_SOCKET'):
+        return os.environ['SPLIT_TEAMS_SOCKET']
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or f"/tmp/split_teams-{os.getuid()}"
+    return os.path.join(runtime_dir, 'split_teams.sock')
+
+
+def _check_own_socket(path):
+    """Raise PermissionError unless `path` is a socket owned by the current user."""
+    import stat
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode):
+        raise PermissionError(f'{path} exists and is not a socket')
+    if st.st_uid != os.getuid():
+        raise PermissionError(f'{path} is owned by another user')
+
+
+class RosterCache:
+    """Memoise a parser per file, re-reading only when the file's mtime or size changes.
+
+    At most `maxsize` files are kept, least recently used first out; entries for
+    files that disappear are dropped.
+    """
+
+    def __init__(self, loader, maxsize=8):
+        from collections import OrderedDict
+        self.loader = loader
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._entries.pop(path, None)
+            raise
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, self.loader(path))
+            self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry[1]
+
+
+def _resolve(cwd, path):
+    if not path:
+        return path
+    return os.path.join(cwd, os.path.expanduser(path))
+
+
+def _handle_split(req, players):
+    import io
+    from contextlib import redirect_stdout, redirect_stderr
+    cwd = req.get('cwd') or os.getcwd()
+    out, err = io.StringIO(), io.StringIO()
+    status = 0
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            args = build_parser().parse_args(req.get('argv') or [])
+            args.input = _resolve(cwd, args.input)
+            args.master = _resolve(cwd, args.master)
+            args.availability = _resolve(cwd, args.availability)
+            args.out_prefix = _resolve(cwd, args.out_prefix)
+            run(args, load_players=players.get)
+        except SystemExit as e:
+            # argparse --help / usage errors
+            status = e.code if isinstance(e.code, int) else 1
+    return {'ok': True, 'status': status, 'output': out.getvalue(), 'stderr': err.getvalue()}
+
+
+def _handle_crosscheck(req, players):
+    cwd = req.get('cwd') or os.getcwd()
+    master = players.get(_resolve(cwd, req['master']))
+    names = parse_availability(_resolve(cwd, req['availability']))
+    matched, unmatched, ambiguous = crosscheck_availability(master, names)
+    return {
+        'ok': True,
+        'matched': [p['name'] for p in matched],
+        'unmatched': unmatched,
+        'ambiguous': [[raw, opts] for raw, opts in ambiguous],
+    }
+
+
+def serve(argv):
+    import argparse
+    import json
+    import socket
+    import socketserver
+    from contextlib import suppress
+
+    parser = argparse.ArgumentParser(prog='split_teams.py serve',
+                                     description='Run the team splitter as a resident daemon on a Unix socket')
+    parser.add_argument('--socket', default=default_socket_path(), help='Unix socket path to listen on')
+    parser.add_argument('--preload', action='append', default=[], metavar='MASTER',
+                        help='Master roster to parse at startup (repeatable)')
+    args = parser.parse_args(argv)
+
+    # availability lists are small and usually one-off temp files, so only
+    # master rosters are cached
+    players = RosterCache(parse_players)
+    for path in args.preload:
+        players.get(path)
+
+    handlers = {'split': _handle_split, 'crosscheck': _handle_crosscheck}
+
+    class Handler(socketserver.StreamRequestHandler):
+        # requests are served one at a time, so don't let a silent client stall the rest
+        timeout = 5
+
+        def handle(self):
+            try:
+                req = json.loads(self.rfile.readline())
+                cmd = req.get('cmd')
+                if cmd == 'ping':
+                    resp = {'ok': True}
+                elif cmd == 'shutdown':
+                    self.server.stopping = True
+                    resp = {'ok': True}
+                elif cmd in handlers:
+                    resp = handlers[cmd](req, players)
+                else:
+                    resp = {'ok': False, 'error': f'unknown command: {cmd!r}'}
+            except Exception as e:
+                resp = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+            self.wfile.write((json.dumps(resp) + '\n').encode('utf-8'))
+
+    sock_dir = os.path.dirname(os.path.abspath(args.socket))
+    if sock_dir == f"/tmp/split_teams-{os.getuid()}":
+        os.makedirs(sock_dir, mode=0o700, exist_ok=True)
+        st = os.lstat(sock_dir)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise SystemExit(f'{sock_dir} must be a directory owned by you with mode 0700')
+
+    # clear a stale socket left by a previous daemon, but refuse to steal a live
+    # one or to remove anything that is not our own socket
+    if os.path.lexists(args.socket):
+        try:
+            _check_own_socket(args.socket)
+        except PermissionError as e:
+            raise SystemExit(f'Cannot listen on {args.socket}: {e}')
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(args.socket)
+        except OSError:
+            os.unlink(args.socket)
+        else:
+            raise SystemExit(f'Another splitter daemon is already listening on {args.socket}')
+        finally:
+            probe.close()
+
+    # bind with a tight umask so the socket is never reachable by other users
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(args.socket, Handler)
+    finally:
+        os.umask(old_umask)
+    server.stopping = False
+    print(f'Listening on {args.socket}', file=sys.stderr)
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with suppress(FileNotFoundError):
+            os.unlink(args.socket)
+
+
+def send_request(req, sock_path=None):
+    """Send one request to the daemon and return its decoded response.
+
+    Raises OSError if no daemon is listening on `sock_path` (PermissionError if
+    the path is not a socket owned by the current user), or ValueError if it
+    closes the connection without a valid reply.
+    """
+    import json
+    import socket
+    sock_path = sock_path or default_socket_path()
+    _check_own_socket(sock_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(sock_path)
+        s.sendall((json.dumps(req) + '\n').encode('utf-8'))
+        with s.makefile('rb') as f:
+            return json.loads(f.readline())
+
+
+def client(argv):
+    """Forward ordinary CLI args to the daemon, running in-process if none is listening."""
+    sock_path = None
+    if argv[:1] == ['--socket']:
+        if len(argv) < 2:
+            print('usage: split_teams.py client [--socket PATH] input [options]', file=sys.stderr)
+            print('split_teams.py client: error: argument --socket: expected one argument', file=sys.stderr)
+            return 2
+        sock_path, argv = argv[1], argv[2:]
+    try:
+        resp = send_request({'cmd': 'split', 'argv': argv, 'cwd': os.getcwd()}, sock_path)
+    except PermissionError as e:
+        print(f'Note: not using splitter daemon ({e}); splitting in-process', file=sys.stderr)
+        run(build_parser().parse_args(argv))
+        return 0
+    except (OSError, ValueError):
+        print('Note: splitter daemon not running; splitting in-process', file=sys.stderr)
+        run(build_parser().parse_args(argv))
+        return 0
+    if not resp.get('ok'):
+        print(f"Error: {resp.get('error')}", file=sys.stderr)
+        return 1
+    sys.stdout.write(resp['output'])
+    sys.stderr.write(resp.get('stderr', ''))
+    return resp['status']
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        return serve(argv[1:])
+    if argv[:1] == ['client']:
+        return client(argv[1:])
+    if argv[:1] == ['batch']:
+        return batch(argv[1:])
+    run(build_parser().parse_args(argv))
+
+
 if __name__ == '__main__':
-    main()
+    sys.exit(main())